@@ -1,77 +1,152 @@
 import os
+import json
+import math
+import threading
+import time
+import orjson
 import streamlit as st
-from typing import Dict, Optional
-from dataclasses import dataclass
-import requests
-from groq import Groq
+from typing import TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# groq and httpx are imported where they are used, not at module level.
+# Streamlit re-runs this script on every widget change. Only the first page
+# load (connection pre-warming) and a button click need these modules.
+if TYPE_CHECKING:
+    import httpx
+    from groq import Groq
 
 # ------------------------------------------------------------------------------
 # Session State Initialization
 # ------------------------------------------------------------------------------
-if 'api_keys' not in st.session_state:
-    st.session_state['api_keys'] = {
-        'aqicn': os.environ.get("AQICN_API_KEY", ""),
-        'groq': os.environ.get("GROQ_API_KEY", "")
+# The sidebar inputs are bound to these keys, so Streamlit tracks their values.
+st.session_state.setdefault('aqicn_key', os.environ.get("AQICN_API_KEY", ""))
+st.session_state.setdefault('groq_key', os.environ.get("GROQ_API_KEY", ""))
+
+def get_api_keys() -> Dict[str, str]:
+    return {
+        'aqicn': st.session_state['aqicn_key'],
+        'groq': st.session_state['groq_key']
     }
 
 # ------------------------------------------------------------------------------
 # Data Models
 # ------------------------------------------------------------------------------
-@dataclass
-class UserInput:
+class UserInput(NamedTuple):
     city: str
     state: str
     country: str
     medical_conditions: Optional[str]
     planned_activity: str
 
+# ------------------------------------------------------------------------------
+# Shared Clients (reused across reruns and sessions)
+# ------------------------------------------------------------------------------
+GROQ_TIMEOUT = 20.0
+GROQ_ATTEMPTS = 2
+# A batch reply is not streamed, so its timeout must cover the whole answer.
+GROQ_BATCH_TIMEOUT_PER_ROW = 10.0
+# Longest retry-after (seconds) on a 429 that is still worth waiting for.
+GROQ_MAX_RETRY_AFTER = 5.0
+
+@st.cache_resource
+def _get_groq_client(api_key: str) -> "Groq":
+    from groq import Groq
+    # Retries (timeouts, connection errors, 5xx, rate limits) are handled by
+    # HealthRecommendationAgent, not the SDK's backoff.
+    return Groq(api_key=api_key, max_retries=0)
+
+@st.cache_resource
+def _get_http_client() -> "httpx.Client":
+    import httpx
+    # Keep-alive HTTP/2 pool so repeated AQICN calls skip the TCP/TLS handshake.
+    return httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=8, max_connections=16),
+        timeout=httpx.Timeout(10.0, connect=2.0)
+    )
+
+@st.cache_resource
+def _get_executor() -> ThreadPoolExecutor:
+    # Worker pool for network calls that can run alongside the script thread.
+    return ThreadPoolExecutor(max_workers=4)
+
 # ------------------------------------------------------------------------------
 # AQI Analyzer using AQICN API for real-time data extraction
 # ------------------------------------------------------------------------------
+AQICN_FEED_URL = "https://api.waqi.info/feed/{city}/?token={token}"
+
+AQICN_MAX_AGE = 3600  # seconds; AQICN stations update roughly hourly
+
+@st.cache_data(persist="disk", max_entries=1024, show_spinner=False)
+def _fetch_aqi_cached(city: str, state: str, country: str, token: str) -> Dict:
+    # Identical lookups are served from the cache across reruns, sessions and
+    # app restarts. Errors raise and are never cached. Persisted caches ignore
+    # ttl, so the fetch time is stored for _fetch_aqi to check.
+    response = _get_http_client().get(AQICN_FEED_URL.format(city=city, token=token))
+    data = orjson.loads(response.content)
+    if data.get('status') != 'ok':
+        raise ValueError(f"API returned status: {data.get('status')}")
+    data['_fetched_at'] = time.time()
+    return data
+
+def _fetch_aqi(city: str, state: str, country: str, token: str) -> Dict:
+    data = _fetch_aqi_cached(city, state, country, token)
+    if time.time() - data.get('_fetched_at', 0) > AQICN_MAX_AGE:
+        # Drop just this entry (memory and disk) and fetch it again, so each
+        # location keeps a single cache file that is overwritten in place.
+        _fetch_aqi_cached.clear(city, state, country, token)
+        data = _fetch_aqi_cached(city, state, country, token)
+    return data
+
+# Result field -> key in the AQICN "iaqi" block.
+IAQI_FIELDS = {
+    'pm25': 'pm25',
+    'pm10': 'pm10',
+    'temperature': 't',
+    'humidity': 'h',
+    'wind_speed': 'w',
+    'co': 'co'
+}
+
+def _iaqi_value(iaqi: Dict, key: str) -> float:
+    entry = iaqi.get(key)
+    return entry.get('v', 0) if isinstance(entry, dict) else 0
+
 class AQIAnalyzer:
     def __init__(self, aqicn_key: str) -> None:
         self.aqicn_key = aqicn_key
 
-    def _format_url(self, city: str) -> str:
-        # Build the API URL using the city name.
-        return f"http://api.waqi.info/feed/{city}/?token={self.aqicn_key}"
+    def start_fetch(self, city: str, state: str, country: str) -> Future:
+        # Issue the AQICN request on the worker pool; no Streamlit calls happen there.
+        return _get_executor().submit(_fetch_aqi, city, state, country, self.aqicn_key)
 
-    def fetch_aqi_data(self, city: str, state: str, country: str) -> Dict[str, float]:
-        # For the AQICN API, we use the city name.
-        url = self._format_url(city)
-        st.info(f"Accessing URL: {url}")
+    def fetch_aqi_data(self, city: str, state: str, country: str,
+                       pending: Optional[Future] = None, render: bool = True) -> Dict[str, float]:
+        # For the AQICN API, we use the city name. The request URL carries the
+        # token, so only the city is shown. With render=False (batch mode) only
+        # errors are shown, not the status line and raw payload.
+        if render:
+            st.info(f"Accessing AQICN for {city}")
         try:
-            response = requests.get(url, timeout=10)
-            data = response.json()
-            if data.get('status') != 'ok':
-                raise ValueError(f"API returned status: {data.get('status')}")
+            # Reuse a request already started with start_fetch() if one is given.
+            data = (pending or self.start_fetch(city, state, country)).result()
             # Extract overall AQI
             aqi = data['data'].get('aqi', 0)
-            # Extract individual metrics from "iaqi"
+            # Extract individual metrics from "iaqi"; missing ones default to 0.
             iaqi = data['data'].get('iaqi', {})
-            pm25 = iaqi.get('pm25', {}).get('v', 0) if isinstance(iaqi.get('pm25'), dict) else 0
-            pm10 = iaqi.get('pm10', {}).get('v', 0) if isinstance(iaqi.get('pm10'), dict) else 0
-            # Temperature, humidity, wind speed, and CO might not be provided. Default to 0.
-            temperature = iaqi.get('t', {}).get('v', 0) if isinstance(iaqi.get('t'), dict) else 0
-            humidity = iaqi.get('h', {}).get('v', 0) if isinstance(iaqi.get('h'), dict) else 0
-            wind_speed = iaqi.get('w', {}).get('v', 0) if isinstance(iaqi.get('w'), dict) else 0
-            co = iaqi.get('co', {}).get('v', 0) if isinstance(iaqi.get('co'), dict) else 0
-
-            result = {
-                'aqi': aqi,
-                'pm25': pm25,
-                'pm10': pm10,
-                'temperature': temperature,
-                'humidity': humidity,
-                'wind_speed': wind_speed,
-                'co': co
-            }
-            with st.expander("📦 Raw AQICN Data", expanded=True):
-                st.json(data)
+            result = {'aqi': aqi}
+            for field, key in IAQI_FIELDS.items():
+                result[field] = _iaqi_value(iaqi, key)
+            if render:
+                with st.expander("📦 Raw AQICN Data", expanded=True):
+                    st.json(data)
             return result
         except Exception as e:
-            st.error(f"Error fetching AQICN data: {str(e)}")
+            st.error(f"Error fetching AQICN data for {city}: {str(e)}")
+            # '_error' tells callers not to ask the model about these zeros.
             return {
+                '_error': str(e),
                 'aqi': 0,
                 'pm25': 0,
                 'pm10': 0,
@@ -84,11 +159,109 @@ class AQIAnalyzer:
 # ------------------------------------------------------------------------------
 # Health Recommendation Agent using Groq API
 # ------------------------------------------------------------------------------
+class RecommendationCache:
+    # Finished Groq answers keyed on the prompt, which is fully determined by
+    # the AQI data and user input. Shared by all sessions, hence the lock.
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, prompt: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(prompt)
+            if entry is None:
+                return None
+            stored_at, text = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[prompt]
+                return None
+            self._entries.move_to_end(prompt)
+            return text
+
+    def set(self, prompt: str, text: str) -> None:
+        # Empty answers are never worth serving again.
+        if not text:
+            return
+        with self._lock:
+            self._entries[prompt] = (time.monotonic(), text)
+            self._entries.move_to_end(prompt)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+@st.cache_resource
+def _get_recommendation_cache(kind: str) -> RecommendationCache:
+    # One cache per answer format: "single" holds markdown, "batch" raw JSON.
+    return RecommendationCache(ttl=1800, max_entries=128)
+
+# Bucket size per reading. The advice does not change between e.g. PM2.5 of
+# 42.7 and 45, and coarser prompts hit the recommendation cache far more often.
+PROMPT_BUCKETS = {
+    'aqi': 10,
+    'pm25': 5,
+    'pm10': 5,
+    'temperature': 2,
+    'humidity': 5,
+    'wind_speed': 5,
+    'co': 10
+}
+
+# Readings where higher means riskier are rounded up, so a bucket never lands
+# in a milder AQI category (e.g. AQI 51 must not become 50). Weather readings
+# have no safer direction and are rounded to nearest.
+ROUND_UP_READINGS = {'aqi', 'pm25', 'pm10', 'co'}
+
+def _bucket(value: Union[float, str], step: int, round_up: bool) -> Union[int, str]:
+    # AQICN reports unavailable readings as "-"; pass those through unchanged.
+    if not isinstance(value, (int, float)):
+        return value
+    # Readings smaller than one bucket are only rounded to whole numbers, so
+    # e.g. CO of 1 ppb is not reported as 10.
+    if abs(value) < step:
+        step = 1
+    if round_up:
+        return int(math.ceil(value / step) * step)
+    return int(math.floor(value / step + 0.5) * step)
+
+def _quantize(aqi_data: Dict[str, float]) -> Dict[str, float]:
+    return {k: _bucket(v, PROMPT_BUCKETS.get(k, 1), k in ROUND_UP_READINGS) for k, v in aqi_data.items()}
+
+# Rows sent in one batch prompt; beyond this, per-row latency outweighs the
+# saved round-trips.
+BATCH_MAX_ROWS = 8
+
+def _parse_batch_results(content: str) -> Dict[int, str]:
+    # Row number -> recommendations. Malformed replies give an empty mapping.
+    try:
+        items = json.loads(content).get('results', [])
+    except (ValueError, AttributeError):
+        return {}
+    by_row = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict) or not item.get('recommendations'):
+            continue
+        row = item.get('row')
+        # Accept 1 or 1.0; strings (including non-ASCII digits) and bools are ignored.
+        if isinstance(row, float) and row.is_integer():
+            row = int(row)
+        if isinstance(row, int) and not isinstance(row, bool):
+            by_row[row] = str(item['recommendations'])
+    return by_row
+
+def _retry_after(error: Exception) -> Optional[float]:
+    # Seconds Groq asks for before retrying a 429, if the header is present.
+    try:
+        return float(error.response.headers.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
 class HealthRecommendationAgent:
     def __init__(self, groq_key: str) -> None:
-        self.client = Groq(api_key=groq_key)
+        self.client = _get_groq_client(groq_key)
 
     def _create_prompt(self, aqi_data: Dict[str, float], user_input: UserInput) -> str:
+        aqi_data = _quantize(aqi_data)
         return f"""
 Based on the following air quality conditions in {user_input.city}, {user_input.state}, {user_input.country}:
 - Overall AQI: {aqi_data['aqi']}
@@ -112,52 +285,193 @@ Provide comprehensive health recommendations covering:
 4. The best time to conduct the activity.
 """
 
-    def get_recommendations(self, aqi_data: Dict[str, float], user_input: UserInput) -> str:
+    def _create_batch_prompt(self, rows: List[Tuple[Dict[str, float], UserInput]]) -> str:
+        lines = []
+        for i, (aqi_data, user_input) in enumerate(rows, start=1):
+            aqi_data = _quantize(aqi_data)
+            lines.append(
+                f"{i}) location={user_input.city}, {user_input.state}, {user_input.country}; "
+                f"aqi={aqi_data['aqi']}; pm25={aqi_data['pm25']} µg/m³; pm10={aqi_data['pm10']} µg/m³; "
+                f"co={aqi_data['co']} ppb; temperature={aqi_data['temperature']}°C; "
+                f"humidity={aqi_data['humidity']}%; wind_speed={aqi_data['wind_speed']} km/h; "
+                f"medical_conditions={user_input.medical_conditions or 'None'}; "
+                f"activity={user_input.planned_activity}"
+            )
+        rows_text = "\n".join(lines)
+        return f"""
+For each numbered row below, give health recommendations based on its air quality
+and weather conditions, covering:
+1. The impact of current air quality on health.
+2. Necessary safety precautions for the planned activity.
+3. Advisability of the planned activity.
+4. The best time to conduct the activity.
+
+Return a JSON object of the form {{"results": [{{"row": <row number>, "recommendations": "<markdown>"}}]}}
+with exactly one entry per row.
+
+ROWS:
+{rows_text}
+"""
+
+    def _create_completion(self, prompt: str, timeout: float = GROQ_TIMEOUT, **kwargs):
+        # Cap each request at `timeout` and retry once right away on timeouts,
+        # dropped connections (APITimeoutError is an APIConnectionError) and 5xx
+        # responses. A 429 is retried only after a short retry-after wait.
+        from groq import APIConnectionError, InternalServerError, RateLimitError
+        for attempt in range(GROQ_ATTEMPTS):
+            try:
+                return self.client.chat.completions.create(
+                    messages=[{"role": "user", "content": prompt}],
+                    model="llama-3.3-70b-versatile",  # Adjust the model if needed.
+                    timeout=timeout,
+                    **kwargs
+                )
+            except (APIConnectionError, InternalServerError):
+                if attempt == GROQ_ATTEMPTS - 1:
+                    raise
+            except RateLimitError as e:
+                wait = _retry_after(e)
+                if attempt == GROQ_ATTEMPTS - 1 or wait is None or wait > GROQ_MAX_RETRY_AFTER:
+                    raise
+                time.sleep(wait)
+
+    def get_recommendations(self, aqi_data: Dict[str, float], user_input: UserInput) -> Iterator[str]:
+        # Yield the answer piece by piece so the UI can render it as it arrives.
         prompt = self._create_prompt(aqi_data, user_input)
-        chat_completion = self.client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile"  # Adjust the model if needed.
-        )
-        return chat_completion.choices[0].message.content
+        cache = _get_recommendation_cache("single")
+        cached = cache.get(prompt)
+        if cached is not None:
+            yield cached
+            return
+        stream = self._create_completion(prompt, stream=True)
+        text = ""
+        for chunk in stream:
+            piece = chunk.choices[0].delta.content or ""
+            text += piece
+            yield piece
+        # Only answers that streamed to completion are remembered.
+        cache.set(prompt, text)
+
+    def get_batch_recommendations(self, rows: List[Tuple[Dict[str, float], UserInput]]) -> List[str]:
+        # One Groq call per BATCH_MAX_ROWS rows instead of one per row.
+        from groq import APIError
+        cache = _get_recommendation_cache("batch")
+        results = []
+        for start in range(0, len(rows), BATCH_MAX_ROWS):
+            batch = rows[start:start + BATCH_MAX_ROWS]
+            prompt = self._create_batch_prompt(batch)
+            content = cache.get(prompt)
+            if content is None:
+                try:
+                    chat_completion = self._create_completion(
+                        prompt,
+                        timeout=GROQ_TIMEOUT + GROQ_BATCH_TIMEOUT_PER_ROW * len(batch),
+                        response_format={"type": "json_object"}
+                    )
+                    content = chat_completion.choices[0].message.content or ""
+                except APIError:
+                    # Failed calls, including JSON-mode rejections (json_validate_failed),
+                    # fall back to the per-row placeholder like malformed replies.
+                    content = ""
+            by_row = _parse_batch_results(content)
+            # Only replies with an answer for every row are worth serving again.
+            if all(i in by_row for i in range(1, len(batch) + 1)):
+                cache.set(prompt, content)
+            for i in range(1, len(batch) + 1):
+                results.append(by_row.get(i) or "No recommendations were returned for this location.")
+        return results
 
 # ------------------------------------------------------------------------------
 # Main Analysis Function
 # ------------------------------------------------------------------------------
-def analyze_conditions(user_input: UserInput, api_keys: Dict[str, str]) -> str:
+def analyze_conditions(user_input: UserInput, api_keys: Dict[str, str]) -> Optional[Iterator[str]]:
     aqi_analyzer = AQIAnalyzer(aqicn_key=api_keys['aqicn'])
+    # Start the AQICN request first so it overlaps setting up the Groq agent.
+    pending = aqi_analyzer.start_fetch(city=user_input.city, state=user_input.state, country=user_input.country)
     health_agent = HealthRecommendationAgent(groq_key=api_keys['groq'])
-    aqi_data = aqi_analyzer.fetch_aqi_data(city=user_input.city, state=user_input.state, country=user_input.country)
+    aqi_data = aqi_analyzer.fetch_aqi_data(city=user_input.city, state=user_input.state,
+                                           country=user_input.country, pending=pending)
+    # fetch_aqi_data has already shown the error; don't ask the model about zeros.
+    if aqi_data.get('_error'):
+        return None
     return health_agent.get_recommendations(aqi_data, user_input)
 
+def analyze_batch(user_inputs: List[UserInput], api_keys: Dict[str, str]) -> List[Optional[str]]:
+    aqi_analyzer = AQIAnalyzer(aqicn_key=api_keys['aqicn'])
+    # Fetch every location concurrently on the worker pool.
+    pending = [aqi_analyzer.start_fetch(city=u.city, state=u.state, country=u.country) for u in user_inputs]
+    health_agent = HealthRecommendationAgent(groq_key=api_keys['groq'])
+    fetched = []
+    rows = []
+    for user_input, future in zip(user_inputs, pending):
+        aqi_data = aqi_analyzer.fetch_aqi_data(city=user_input.city, state=user_input.state,
+                                               country=user_input.country, pending=future, render=False)
+        ok = not aqi_data.get('_error')
+        fetched.append(ok)
+        if ok:
+            rows.append((aqi_data, user_input))
+    # Only locations with real readings are sent to the model; failed ones map
+    # to None (their error has already been shown).
+    recommendations = iter(health_agent.get_batch_recommendations(rows) if rows else [])
+    return [next(recommendations) if ok else None for ok in fetched]
+
 # ------------------------------------------------------------------------------
 # Streamlit UI Setup Functions
 # ------------------------------------------------------------------------------
+PREWARM_TIMEOUT = 2.0
+
+def _prewarm_connections(groq_key: str) -> None:
+    # Open the AQICN and Groq connections while the user fills in the form.
+    # Failures here are harmless; the real request simply connects itself.
+    try:
+        _get_http_client().head("https://api.waqi.info/", timeout=PREWARM_TIMEOUT)
+        if groq_key:
+            _get_groq_client(groq_key).models.list(timeout=PREWARM_TIMEOUT)
+    except Exception:
+        pass
+
+@st.cache_resource(show_spinner=False)
+def _prewarm_once(groq_key: str) -> threading.Thread:
+    # The warmed pools are process-wide, so this runs once per process and Groq
+    # key rather than once per visitor. A separate daemon thread keeps it off
+    # the worker pool that real AQICN fetches use.
+    thread = threading.Thread(target=_prewarm_connections, args=(groq_key,), daemon=True)
+    thread.start()
+    return thread
+
 def setup_page():
     st.set_page_config(page_title="AQI Analysis Agent", page_icon="🌍", layout="wide")
+    _prewarm_once(get_api_keys()['groq'])
     st.title("🌍 AQI Analysis Agent")
     st.info("Get personalized health recommendations based on real-time air quality data.")
 
+def _on_key_change(state_key: str, label: str) -> None:
+    # Runs only when the user edits a key, so the confirmation is shown once.
+    if st.session_state[state_key]:
+        st.session_state['_updated_key'] = label
+
 def render_sidebar():
     with st.sidebar:
         st.header("🔑 API Configuration")
-        new_aqicn_key = st.text_input(
+        st.text_input(
             "AQICN API Key",
             type="password",
-            value=st.session_state['api_keys']['aqicn'],
+            key="aqicn_key",
+            on_change=_on_key_change,
+            args=("aqicn_key", "AQICN"),
             help="Enter your AQICN API key"
         )
-        new_groq_key = st.text_input(
+        st.text_input(
             "Groq API Key",
             type="password",
-            value=st.session_state['api_keys']['groq'],
+            key="groq_key",
+            on_change=_on_key_change,
+            args=("groq_key", "Groq"),
             help="Enter your Groq API key"
         )
-        if new_aqicn_key and new_aqicn_key != st.session_state['api_keys']['aqicn']:
-            st.session_state['api_keys']['aqicn'] = new_aqicn_key
-            st.success("✅ AQICN API key updated!")
-        if new_groq_key and new_groq_key != st.session_state['api_keys']['groq']:
-            st.session_state['api_keys']['groq'] = new_groq_key
-            st.success("✅ Groq API key updated!")
+        updated = st.session_state.pop('_updated_key', None)
+        if updated:
+            st.success(f"✅ {updated} API key updated!")
 
 def render_main_content():
     st.header("📍 Location Details")
@@ -174,7 +488,7 @@ def render_main_content():
     if st.button("🔍 Analyze & Get Recommendations"):
         if not (city and planned_activity):
             st.error("Please fill in all required fields.")
-        elif not (st.session_state['api_keys']['aqicn'] and st.session_state['api_keys']['groq']):
+        elif not all(get_api_keys().values()):
             st.error("Please provide both your AQICN and Groq API keys in the sidebar.")
         else:
             user_input = UserInput(
@@ -185,10 +499,16 @@ def render_main_content():
                 planned_activity=planned_activity
             )
             with st.spinner("🔄 Analyzing conditions..."):
-                recommendations = analyze_conditions(user_input, st.session_state['api_keys'])
-                st.success("✅ Analysis completed!")
+                chunks = analyze_conditions(user_input, get_api_keys())
+                if chunks is None:
+                    return
                 st.markdown("### 📦 Recommendations")
-                st.markdown(recommendations)
+                placeholder = st.empty()
+                recommendations = ""
+                for chunk in chunks:
+                    recommendations += chunk
+                    placeholder.markdown(recommendations)
+                st.success("✅ Analysis completed!")
                 st.download_button(
                     "💾 Download Recommendations",
                     data=recommendations,
@@ -196,10 +516,66 @@ def render_main_content():
                     mime="text/plain"
                 )
 
+def render_batch_content():
+    st.header("🗺️ Batch Locations")
+    st.caption(f"Analyze several locations at once; rows are sent to the model in groups of {BATCH_MAX_ROWS}.")
+    rows = st.data_editor(
+        [{"City": "", "State": "", "Country": "France", "Planned Activity": ""}],
+        num_rows="dynamic",
+        use_container_width=True,
+        key="batch_rows"
+    )
+    medical_conditions = st.text_input(
+        "Medical Conditions (optional)",
+        placeholder="e.g., asthma, allergies",
+        key="batch_medical_conditions"
+    )
+
+    if st.button("🔍 Analyze All Locations"):
+        user_inputs = [
+            UserInput(
+                city=row["City"],
+                state=row.get("State") or "",
+                country=row.get("Country") or "",
+                medical_conditions=medical_conditions,
+                planned_activity=row["Planned Activity"]
+            )
+            for row in rows
+            if row.get("City") and row.get("Planned Activity")
+        ]
+        if not user_inputs:
+            st.error("Please add at least one row with a city and a planned activity.")
+        elif not all(get_api_keys().values()):
+            st.error("Please provide both your AQICN and Groq API keys in the sidebar.")
+        else:
+            with st.spinner("🔄 Analyzing conditions..."):
+                recommendations = analyze_batch(user_inputs, get_api_keys())
+                if all(text is None for text in recommendations):
+                    return
+                st.success("✅ Analysis completed!")
+                report = []
+                for user_input, text in zip(user_inputs, recommendations):
+                    if text is None:
+                        continue
+                    title = f"### 📍 {user_input.city}: {user_input.planned_activity}"
+                    st.markdown(title)
+                    st.markdown(text)
+                    report.append(f"{title}\n\n{text}")
+                st.download_button(
+                    "💾 Download Recommendations",
+                    data="\n\n".join(report),
+                    file_name="aqi_recommendations_batch.txt",
+                    mime="text/plain"
+                )
+
 def main():
     setup_page()
     render_sidebar()
-    render_main_content()
+    single_tab, batch_tab = st.tabs(["📍 Single Location", "🗺️ Batch"])
+    with single_tab:
+        render_main_content()
+    with batch_tab:
+        render_batch_content()
 
 if __name__ == "__main__":
     main()